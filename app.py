@@ -2,74 +2,206 @@ import streamlit as st
 from data import (
     get_all_wheelchairs, 
     get_aac_devices, 
-    get_aac_device_by_make_model, 
     get_recommendations,
-    get_floorstands_for_device,
-    get_tablemounts_for_device,
-    MountLogic,
-    get_db_connection
+    RecommendationError,
+    get_floorstands_by_make_model,
+    get_tablemounts_by_make_model,
+    REHADAPT,
+    DAESSY,
+    get_database_version
 )
 import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+# HTML templates shared by every page
+H1 = "<h1 style='text-align: center;'>{}</h1>"
+H2 = "<h2 style='font-size: 24px;'>{}</h2>"
+GREEN_P = "<p style='color: #28a745; font-size: 16px;'>{}</p>"
+NOTE_P = "<p style='color: {}; font-size: 14px; font-style: italic;'>ℹ️ {}</p>"
+
+# Static markdown blocks, built once at import rather than on every render
+LANDING_TITLE = H1.format("AAC Mount Finder")
+REHADAPT_HEADER = H2.format("Suggested Rehadapt Solution")
+REHADAPT_TAGLINE = GREEN_P.format("+ Flexible positioning with quick-release system for easy adjustment")
+DAESSY_HEADER = H2.format("Suggested Daessy Solution")
+DAESSY_TAGLINE = GREEN_P.format("+ Maximum stability with locked positioning for precise access methods such as Eyegaze")
+CROSS_HEADER = H2.format("Cross-Manufacturer Combinations")
+CROSS_TAGLINE = GREEN_P.format("+ Allows for using a Daessy Clamp with Rehadapt Mount using M3D Adapter Ring")
+OTHER_HEADER = H2.format("Other Compatible Mounts (By weight)")
+OTHER_TAGLINE = GREEN_P.format("+ Other suitable mounts by supplier depending on device weight")
+LEFT_HAND_SIDE_NOTE = "*🔒 Sturdy mount with rotation lock recommended for left-hand side mounting*"
+
+# Suggested-solution sections in display order:
+# (manufacturer key, display name, header, tagline, toggle key, shows left-hand note)
+SUPPLIER_SECTIONS = (
+    (REHADAPT, "Rehadapt", REHADAPT_HEADER, REHADAPT_TAGLINE, "exp_rehadapt", True),
+    (DAESSY, "Daessy", DAESSY_HEADER, DAESSY_TAGLINE, "exp_daessy", False),
+)
 
-# Configure logging for the Streamlit app
-logging.basicConfig(level=logging.INFO)
-
-def get_device_weight(aac_device_id: int) -> float:
-    """Helper function to get device weight by ID"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT weight FROM aac_devices WHERE id = ?", (aac_device_id,))
-            result = cursor.fetchone()
-            return result[0] if result else 0.0
-    except Exception as e:
-        logging.error(f"Failed to get device weight: {e}")
-        return 0.0
+WARNING_TEMPLATE = """
+    ⚠️ Please note: This app is intended to be used as a guide, and the suggestions provided are based on general compatibility. The final solution may 
+    vary depending on factors such as:
+{factors}
+
+    Always consult with a qualified professional to confirm the most appropriate {solution} for your specific needs.
+    """
+
+def _warning(solution, factors):
+    """Fill the shared disclaimer with a page's solution type and factors"""
+    return WARNING_TEMPLATE.format(solution=solution, factors="\n".join(f"    - {f}" for f in factors))
+
+WHEELCHAIR_WARNING = _warning("mounting solution", [
+    "Wheelchair customisations or modifications",
+    "Specific positioning requirements",
+    "User needs and preferences",
+    "Additional accessories on the wheelchair",
+])
+FLOORSTAND_WARNING = _warning("floor stand solution", [
+    "Specific positioning requirements",
+    "User needs and preferences",
+    "Environmental considerations",
+    "Height and weight requirements",
+])
+TABLEMOUNT_WARNING = _warning("table mount solution", [
+    "Table thickness and material",
+    "Specific positioning requirements",
+    "User needs and preferences",
+    "Environmental considerations",
+    "Desk/table stability requirements",
+])
+
+WELCOME_INTRO = """
+    Welcome to the AAC Mount Finder! This tool will help you find compatible mounting solutions 
+    for your AAC device. Please choose the type of mounting solution you need:
+    """
+WHEELCHAIR_INTRO = """
+    This tool will help you find compatible mounting solutions 
+    for your wheelchair and AAC device combination.
+    """
+FLOORSTAND_INTRO = """
+    This tool will help you find suitable floor stand solutions for your AAC device.
+    """
+TABLEMOUNT_INTRO = """
+    This tool will help you find suitable table mounting solutions for your AAC device.
+    """
 
-def display_component_info(component, component_type="Component"):
-    """Helper function to display component information consistently"""
-    st.write(f"**{component_type}:** {component[1]}")
+@st.cache_data(persist="disk", max_entries=4)
+def _load_wheelchairs(db_version: Tuple[int, int]):
+    """Cached wrapper around get_all_wheelchairs - reference data rarely changes
     
-    # Handle different component structures
-    if component_type == "Mount":
-        # Mounts have structure: (id, name, manufacturer, weight_capacity, description, url)
-        if len(component) > 4:
-            st.write(component[4])  # description
-        if len(component) > 5 and component[5]:
-            st.markdown(f"[More Info]({component[5]})")  # url
-    else:
-        # Clamps and Adaptors have structure: (id, name, manufacturer, description, url)
-        if len(component) > 3:
-            st.write(component[3])  # description
-        if len(component) > 4 and component[4]:
-            st.markdown(f"[More Info]({component[4]})")  # url
+    Persisted to disk so restarts skip the query; db_version keys the
+    cache so an edited or new database invalidates it. Returns (model, id)
+    pairs as a tuple so the cached value can't be mutated.
+    """
+    return tuple(get_all_wheelchairs().items())
+
+@st.cache_data(persist="disk", max_entries=4)
+def _make_model_index(db_version: Tuple[int, int]):
+    """Load AAC devices as a sorted make list, a make -> sorted models mapping
+    and a (make, model) -> id mapping
+    """
+    # Rows arrive ORDER BY make, model, id, so first-seen order is sorted order
+    models_by_make = {}
+    device_ids = {}
+    for make, model, device_id in get_aac_devices():
+        if (make, model) not in device_ids:
+            device_ids[(make, model)] = device_id
+            models_by_make.setdefault(make, []).append(model)
+    return list(models_by_make), models_by_make, device_ids
+
+def _device_id(make: str, model: str):
+    """Look up an AAC device ID in the cached make/model index"""
+    _, _, device_ids = _make_model_index(get_database_version())
+    return device_ids.get((make, model))
+
+@st.cache_data(ttl="1h", max_entries=256)
+def _cached_floorstands(make: str, model: str):
+    """Cached wrapper around get_floorstands_by_make_model"""
+    return get_floorstands_by_make_model(make, model)
+
+@st.cache_data(ttl="1h", max_entries=256)
+def _cached_tablemounts(make: str, model: str):
+    """Cached wrapper around get_tablemounts_by_make_model"""
+    return get_tablemounts_by_make_model(make, model)
+
+@st.cache_data(ttl="15m", max_entries=256)
+def _cached_recommendations(wheelchair_id: int, aac_device_id: int, left_hand_side: bool = False):
+    """Cached wrapper around get_recommendations keyed by the selection"""
+    return get_recommendations(wheelchair_id, aac_device_id, left_hand_side=left_hand_side)
+
+@dataclass(frozen=True)
+class SolutionSection:
+    """A headed, toggleable group of markdown blocks and mount tables
+    
+    A block is either a markdown string or a tuple of table rows. Blocks are
+    told apart by shape, not by a class defined here: app.py is re-executed on
+    every rerun, so views kept in session state would hold a stale class.
+    """
+    header: str
+    tagline: str
+    toggle_label: str
+    toggle_key: str
+    blocks: Tuple[Union[str, Tuple[dict, ...]], ...]
+
+@dataclass(frozen=True)
+class SolutionView:
+    """Pre-formatted mount solutions for one wheelchair/device/side selection"""
+    location: Optional[str]
+    note_html: Optional[str]
+    sections: Tuple[SolutionSection, ...]
+
+def format_component_info(component, component_type="Component"):
+    """Helper function to format component information consistently as markdown"""
+    # Mounts, clamps and adaptors all expose name, description and url
+    parts = [f"**{component_type}:** {component.name}"]
+    if component.description:
+        parts.append(component.description)
+    if component.url:
+        parts.append(f"[More Info]({component.url})")
+    
+    # The whole component renders as a single markdown element
+    return "\n\n".join(parts)
+
+def format_solution(manufacturer, clamp, mount, note=None):
+    """Helper function to format a complete clamp + mount solution as one markdown block"""
+    parts = [f"Complete {manufacturer} mounting solution:"]
+    if note:
+        parts.append(note)
+    parts.append(format_component_info(clamp, "Inner Clamp"))
+    parts.append(format_component_info(mount, "Mount"))
+    return "\n\n".join(parts)
+
+def mount_table(mounts) -> Tuple[dict, ...]:
+    """Helper function to tabulate a list of mounts for a single st.dataframe"""
+    return tuple(
+        {"Name": mount.name, "Description": mount.description, "More Info": mount.url}
+        for mount in mounts
+    )
 
 def display_floorstand_info(floorstand):
     """Helper function to display floorstand information"""
-    # Floorstand structure: (id, name, manufacturer, description, url, weight_capacity, max_height)
-    st.write(f"**Name:** {floorstand[1]}")
-    if len(floorstand) > 3 and floorstand[3]:
-        st.write(f"**Description:** {floorstand[3]}")
-    if len(floorstand) > 5 and floorstand[5]:
-        st.write(f"**Max Weight:** {floorstand[5]} kg")
-    if len(floorstand) > 6 and floorstand[6]:
-        st.write(f"**Max Height:** {floorstand[6]} mm")
-    if len(floorstand) > 4 and floorstand[4]:
-        st.markdown(f"[More Info]({floorstand[4]})")
+    st.write(f"**Name:** {floorstand.name}")
+    if floorstand.description:
+        st.write(f"**Description:** {floorstand.description}")
+    if floorstand.weight_capacity:
+        st.write(f"**Max Weight:** {floorstand.weight_capacity} kg")
+    if floorstand.max_height:
+        st.write(f"**Max Height:** {floorstand.max_height} mm")
+    if floorstand.url:
+        st.markdown(f"[More Info]({floorstand.url})")
 
 def display_floorstands_by_manufacturer(floorstands):
     """Display floorstands organized by manufacturer"""
-    # Group floorstands by manufacturer
-    manufacturers = {}
+    # Group floorstands by manufacturer (rows arrive ordered by manufacturer, name)
+    manufacturers = defaultdict(list)
     for floorstand in floorstands:
-        manufacturer = floorstand[2]  # manufacturer is at index 2
-        if manufacturer not in manufacturers:
-            manufacturers[manufacturer] = []
-        manufacturers[manufacturer].append(floorstand)
+        manufacturers[floorstand.manufacturer].append(floorstand)
     
     # Display each manufacturer's floorstands
     for manufacturer, stands in manufacturers.items():
-        st.markdown(f"<h2 style='font-size: 24px;'>{manufacturer} Solutions</h2>", unsafe_allow_html=True)
+        st.markdown(H2.format(f"{manufacturer} Solutions"), unsafe_allow_html=True)
         
         with st.expander(f"Show/Hide {manufacturer} Floorstands"):
             for floorstand in stands:
@@ -78,194 +210,229 @@ def display_floorstands_by_manufacturer(floorstands):
 
 def display_tablemount_info(tablemount):
     """Display information for a single table mount"""
-    # Tablemount structure: (id, name, manufacturer, description, url, max_weight, style)
-    st.write(f"**Name:** {tablemount[1]}")
-    if len(tablemount) > 3 and tablemount[3]:
-        st.write(f"**Description:** {tablemount[3]}")
-    if len(tablemount) > 5 and tablemount[5]:
-        st.write(f"**Max Weight:** {tablemount[5]} kg")
-    if len(tablemount) > 6 and tablemount[6]:
-        st.write(f"**Style:** {tablemount[6]}")
-    if len(tablemount) > 4 and tablemount[4]:
-        st.markdown(f"[More Info]({tablemount[4]})")
+    st.write(f"**Name:** {tablemount.name}")
+    if tablemount.description:
+        st.write(f"**Description:** {tablemount.description}")
+    if tablemount.max_weight:
+        st.write(f"**Max Weight:** {tablemount.max_weight} kg")
+    if tablemount.style:
+        st.write(f"**Style:** {tablemount.style}")
+    if tablemount.url:
+        st.markdown(f"[More Info]({tablemount.url})")
 
 def display_tablemounts_by_manufacturer_and_style(tablemounts):
     """Display table mounts organized by manufacturer and style"""
-    manufacturers = {}
+    # Rows arrive ordered by manufacturer, style, name
+    manufacturers = defaultdict(list)
     for tablemount in tablemounts:
-        manufacturer = tablemount[2]
-        style = tablemount[6] if len(tablemount) > 6 else "Unknown Style"
-        key = (manufacturer, style)
-        if key not in manufacturers:
-            manufacturers[key] = []
-        manufacturers[key].append(tablemount)
+        manufacturers[(tablemount.manufacturer, tablemount.style or "Unknown Style")].append(tablemount)
     
     for (manufacturer, style), mounts in manufacturers.items():
-        st.markdown(f"<h2 style='font-size: 24px;'>{manufacturer} - {style}</h2>", unsafe_allow_html=True)
+        st.markdown(H2.format(f"{manufacturer} - {style}"), unsafe_allow_html=True)
         with st.expander(f"Show/Hide {manufacturer} {style} Table Mounts"):
             for mount in mounts:
                 display_tablemount_info(mount)
                 st.write("---")
 
 
-def display_mount_solutions(recommendations, aac_device_id):
-    """Display the mount solutions in organized sections"""
+def build_solution_view(recommendations) -> SolutionView:
+    """Pre-format the mount solutions for a set of recommendations"""
     
-    # Get manufacturer-specific components
-    rehadapt_clamps = [c for c in recommendations["frame_clamps"] if c[2].lower() == 'rehadapt']
-    rehadapt_mounts = [m for m in recommendations["mounts"] if m[2].lower() == 'rehadapt']
-    daessy_clamps = [c for c in recommendations["frame_clamps"] if c[2].lower() == 'daessy']
-    daessy_mounts = [m for m in recommendations["mounts"] if m[2].lower() == 'daessy']
+    # Get manufacturer-specific components, already grouped by the data layer
+    clamps_by_mfr = recommendations["clamps_by_manufacturer"]
+    mounts_by_mfr = recommendations["mounts_by_manufacturer"]
     
-    device_weight = recommendations.get("device_weight", 0.0)
+    left_hand_side = recommendations.get("left_hand_side", False)
     
-    # Display mount location if available
+    # Mount location if available
+    location = None
     if recommendations.get("mount_location"):
-        st.info(f"💡 **Suggested Mounting Location:** {recommendations['mount_location']}")
+        location = f"💡 **Suggested Mounting Location:** {recommendations['mount_location']}"
     
-    # Display mounting side recommendation note
+    # Mounting side recommendation note
+    note_html = None
     if recommendations.get("mount_note"):
-        side_color = "#17a2b8" if recommendations.get("left_hand_side") else "#28a745"
-        st.markdown(f"<p style='color: {side_color}; font-size: 14px; font-style: italic;'>ℹ️ {recommendations['mount_note']}</p>", unsafe_allow_html=True)
+        side_color = "#17a2b8" if left_hand_side else "#28a745"
+        note_html = NOTE_P.format(side_color, recommendations["mount_note"])
 
-    # Rehadapt Solution
-    if rehadapt_clamps and rehadapt_mounts:
-        st.markdown("<h2 style='font-size: 24px;'>Suggested Rehadapt Solution</h2>", unsafe_allow_html=True)
-        st.markdown("<p style='color: #28a745; font-size: 16px;'>+ Flexible positioning with quick-release system for easy adjustment</p>", unsafe_allow_html=True)
-        
-        # Get the primary Rehadapt mount based on weight and side
-        primary_rehadapt_id = MountLogic.get_rehadapt_mount_id(device_weight, recommendations.get("left_hand_side", False))
-        primary_rehadapt_mount = next((m for m in rehadapt_mounts if m[0] == primary_rehadapt_id), rehadapt_mounts[0] if rehadapt_mounts else None)
-        
-        with st.expander("Show/Hide Solution"):
-            st.write("Complete Rehadapt mounting solution:")
-            if recommendations.get("left_hand_side"):
-                st.markdown("*🔒 Sturdy mount with rotation lock recommended for left-hand side mounting*")
-            clamp = rehadapt_clamps[0]
-            display_component_info(clamp, "Inner Clamp")
-            if primary_rehadapt_mount:
-                display_component_info(primary_rehadapt_mount, "Mount")
-            else:
-                st.warning("No suitable Rehadapt mount found for the selected criteria.")
-
-    # Daessy Solution
-    if daessy_clamps and daessy_mounts:
-        st.markdown("<h2 style='font-size: 24px;'>Suggested Daessy Solution</h2>", unsafe_allow_html=True)
-        st.markdown("<p style='color: #28a745; font-size: 16px;'>+ Maximum stability with locked positioning for precise access methods such as Eyegaze</p>", unsafe_allow_html=True)
-        
-        # Get the primary Daessy mount based on weight and side
-        primary_daessy_id = MountLogic.get_daessy_mount_id(device_weight, recommendations.get("left_hand_side", False))
-        primary_daessy_mount = next((m for m in daessy_mounts if m[0] == primary_daessy_id), daessy_mounts[0] if daessy_mounts else None)
-        
-        with st.expander("Show/Hide Solution"):
-            st.write("Complete Daessy mounting solution:")
-            clamp = daessy_clamps[0]
-            display_component_info(clamp, "Inner Clamp")
-            if primary_daessy_mount:
-                display_component_info(primary_daessy_mount, "Mount")
-            else:
-                st.warning("No suitable Daessy mount found for the selected criteria.")
+    # Every remaining section needs at least one compatible mount
+    if not mounts_by_mfr.get(REHADAPT) and not mounts_by_mfr.get(DAESSY):
+        return SolutionView(location, note_html, ())
+    
+    # Primary mount IDs based on weight and side, as chosen by get_recommendations
+    primary_ids = dict(zip((REHADAPT, DAESSY), recommendations["primary_mount_ids"]))
+    
+    # Index mounts by ID for direct lookups
+    mounts_by_id = {mfr: {m.id: m for m in mounts_by_mfr.get(mfr, [])} for mfr in primary_ids}
+    
+    sections = []
+
+    # Suggested solution per supplier: inner clamp + primary mount
+    for mfr, name, header, tagline, toggle_key, side_note in SUPPLIER_SECTIONS:
+        clamps = clamps_by_mfr.get(mfr, [])
+        mounts = mounts_by_mfr.get(mfr, [])
+        if clamps and mounts:
+            # Get the primary mount based on weight and side
+            primary_mount = mounts_by_id[mfr].get(primary_ids[mfr], mounts[0])
+            note = LEFT_HAND_SIDE_NOTE if side_note and left_hand_side else None
+            block = format_solution(name, clamps[0], primary_mount, note)
+            sections.append(SolutionSection(header, tagline, "Show/Hide Solution", toggle_key, (block,)))
 
     # Cross-manufacturer combinations
-    if daessy_clamps and rehadapt_mounts and recommendations.get("adapter_ring"):
-        st.markdown("<h2 style='font-size: 24px;'>Cross-Manufacturer Combinations</h2>", unsafe_allow_html=True)
-        st.markdown("<p style='color: #28a745; font-size: 16px;'>+ Allows for using a Daessy Clamp with Rehadapt Mount using M3D Adapter Ring</p>", unsafe_allow_html=True)
+    daessy_clamps = clamps_by_mfr.get(DAESSY, [])
+    if daessy_clamps and mounts_by_mfr.get(REHADAPT) and recommendations.get("adapter_ring"):
+        blocks = ["**Note:** The following combinations require an adapter ring:"]
         
-        with st.expander("Show/Hide Combinations"):
-            st.write("**Note:** The following combinations require an adapter ring:")
-            
-            # Get the primary Rehadapt mount for cross-compatibility
-            primary_rehadapt_id = MountLogic.get_rehadapt_mount_id(device_weight, recommendations.get("left_hand_side", False))
-            suitable_rehadapt_mount = next((m for m in rehadapt_mounts if m[0] == primary_rehadapt_id), None)
-            
-            if suitable_rehadapt_mount:
-                for clamp in daessy_clamps:
-                    st.write(f"**Daessy Clamp:** {clamp[1]} + **Rehadapt Mount:** {suitable_rehadapt_mount[1]}")
-                    st.write("**Required Adapter Ring:**")
-                    adapter = recommendations["adapter_ring"]
-                    st.write(f"- {adapter[1]}")
-                    st.write(adapter[3])
-                    if len(adapter) > 4 and adapter[4]:
-                        st.markdown(f"[More Info]({adapter[4]})")
-                    st.write("")
+        # Get the primary Rehadapt mount for cross-compatibility
+        suitable_rehadapt_mount = mounts_by_id[REHADAPT].get(primary_ids[REHADAPT])
+        
+        if suitable_rehadapt_mount:
+            adapter = recommendations["adapter_ring"]
+            for clamp in daessy_clamps:
+                parts = [
+                    f"**Daessy Clamp:** {clamp.name} + **Rehadapt Mount:** {suitable_rehadapt_mount.name}",
+                    "**Required Adapter Ring:**",
+                    f"- {adapter.name}",
+                ]
+                if adapter.description:
+                    parts.append(adapter.description)
+                if adapter.url:
+                    parts.append(f"[More Info]({adapter.url})")
+                blocks.append("\n\n".join(parts))
+                blocks.append("")
+        sections.append(SolutionSection(CROSS_HEADER, CROSS_TAGLINE, "Show/Hide Combinations", "exp_cross", tuple(blocks)))
 
     # Other Suitable Mounts
-    other_rehadapt_mounts = [m for m in rehadapt_mounts if m[0] != MountLogic.get_rehadapt_mount_id(device_weight, recommendations.get("left_hand_side", False))]
-    other_daessy_mounts = [m for m in daessy_mounts if m[0] != MountLogic.get_daessy_mount_id(device_weight, recommendations.get("left_hand_side", False))]
+    blocks = []
+    for mfr, name, *_ in SUPPLIER_SECTIONS:
+        other_mounts = [m for mount_id, m in mounts_by_id[mfr].items() if mount_id != primary_ids[mfr]]
+        if other_mounts:
+            blocks.append(f"### {name}")
+            blocks.append(mount_table(other_mounts))
+    if blocks:
+        sections.append(SolutionSection(OTHER_HEADER, OTHER_TAGLINE, "Show/Hide Solutions", "exp_other", tuple(blocks)))
     
-    if other_rehadapt_mounts or other_daessy_mounts:
-        st.markdown("<h2 style='font-size: 24px;'>Other Compatible Mounts (By weight)</h2>", unsafe_allow_html=True)
-        st.markdown("<p style='color: #28a745; font-size: 16px;'>+ Other suitable mounts by supplier depending on device weight</p>", unsafe_allow_html=True)
-        
-        with st.expander("Show/Hide Solutions"):
-            if other_rehadapt_mounts:
-                st.subheader("Rehadapt")
-                for mount in other_rehadapt_mounts:
-                    display_component_info(mount, "Mount")
-                    st.write("")
-                
-            if other_daessy_mounts:
-                st.subheader("Daessy")
-                for mount in other_daessy_mounts:
-                    display_component_info(mount, "Mount")
-                    st.write("")
+    return SolutionView(location, note_html, tuple(sections))
+
+def display_mount_solutions(view: SolutionView):
+    """Display the mount solutions in organized sections
+    
+    Section bodies sit behind toggles kept in session state, so they are only
+    sent to the browser once opened. This runs inside the show_solution_panel
+    fragment, so a toggle only reruns the results.
+    """
+    if view.location:
+        st.info(view.location)
+    if view.note_html:
+        st.markdown(view.note_html, unsafe_allow_html=True)
+
+    for section in view.sections:
+        st.markdown(section.header, unsafe_allow_html=True)
+        st.markdown(section.tagline, unsafe_allow_html=True)
+        if st.toggle(section.toggle_label, key=section.toggle_key):
+            for block in section.blocks:
+                if isinstance(block, str):
+                    st.markdown(block)
+                else:
+                    st.dataframe(
+                        block,
+                        hide_index=True,
+                        column_config={"More Info": st.column_config.LinkColumn(display_text="More Info")},
+                    )
+
+@st.fragment
+def show_solution_panel():
+    """Display recommendations for the selection stored in session state"""
+    selection = st.session_state.solution_request
+    try:
+        # Reuse the formatted view if this selection is the one last shown;
+        # only the current selection is ever re-shown, so keep just that one
+        rendered_selection, view = st.session_state.get("rendered_solution", (None, None))
+
+        if rendered_selection != selection:
+            # Get recommendations
+            recommendations = _cached_recommendations(*selection)
+            view = build_solution_view(recommendations)
+            st.session_state.rendered_solution = (selection, view)
+
+        # Display solutions
+        display_mount_solutions(view)
+
+    except RecommendationError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"An error occurred while finding solutions: {e}")
+        logging.error(f"Solution finding failed: {e}")
+
+def go_to_page(page):
+    """Button callback that switches page via the URL query string"""
+    # Callbacks run before the rerun the click triggers, so no st.rerun() is needed
+    st.query_params["page"] = page
 
 def show_landing_page():
     """Display the landing page with three options"""
-    st.markdown("<h1 style='text-align: center;'>AAC Mount Finder</h1>", unsafe_allow_html=True)
+    st.markdown(LANDING_TITLE, unsafe_allow_html=True)
     
-    st.write("""
-    Welcome to the AAC Mount Finder! This tool will help you find compatible mounting solutions 
-    for your AAC device. Please choose the type of mounting solution you need:
-    """)
+    st.write(WELCOME_INTRO)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🦽 Wheelchair Mounts", use_container_width=True):
-            st.session_state.page = "wheelchair_mounts"
-            st.rerun()
+        st.button("🦽 Wheelchair Mounts", use_container_width=True, on_click=go_to_page, args=("wheelchair_mounts",))
     
     with col2:
-        if st.button("🏢 Floor Stands", use_container_width=True):
-            st.session_state.page = "floorstands"
-            st.rerun()
+        st.button("🏢 Floor Stands", use_container_width=True, on_click=go_to_page, args=("floorstands",))
     
     with col3:
-        if st.button("📋 Table Mounts", use_container_width=True):
-            st.session_state.page = "tablemounts"
-            st.rerun()
+        st.button("📋 Table Mounts", use_container_width=True, on_click=go_to_page, args=("tablemounts",))
 
-def show_wheelchair_mounts():
-    """Display the wheelchair mounts page (existing functionality)"""
-    st.markdown("<h1 style='text-align: center;'>Wheelchair Mount Finder</h1>", unsafe_allow_html=True)
+def show_page_header(title, intro, warning):
+    """Display the title, back button, introduction and disclaimer shared by the finder pages"""
+    st.markdown(H1.format(title), unsafe_allow_html=True)
     
     # Back button
-    if st.button("← Back to Main Menu"):
-        st.session_state.page = "landing"
-        st.rerun()
+    st.button("← Back to Main Menu", on_click=go_to_page, args=("landing",))
 
-    st.write("""
-    This tool will help you find compatible mounting solutions 
-    for your wheelchair and AAC device combination.
-    """)
+    st.write(intro)
 
     # Warning message
-    st.warning("""
-    ⚠️ Please note: This app is intended to be used as a guide, and the suggestions provided are based on general compatibility. The final solution may 
-    vary depending on factors such as:
-    - Wheelchair customisations or modifications
-    - Specific positioning requirements
-    - User needs and preferences
-    - Additional accessories on the wheelchair
+    st.warning(warning)
+
+def select_aac_device():
+    """Display the AAC device make/model selectors
+    
+    Returns the selected (make, model), or None if no devices could be loaded.
+    """
+    # Load AAC devices
+    try:
+        make_list, models_by_make, _ = _make_model_index(get_database_version())
+    except Exception as e:
+        st.error(f"Failed to load data from database: {e}")
+        logging.error(f"Data loading failed: {e}")
+        return None
+
+    if not make_list:
+        st.error("No AAC devices found in database.")
+        return None
+
+    # Device selection interface
+    makes = ["--Select make--"] + make_list
+    selected_make = st.selectbox("Select AAC Device Make", makes)
 
-    Always consult with a qualified professional to confirm the most appropriate mounting solution for your specific needs.
-    """)
+    selected_model = "--Select model--"
+    if selected_make != "--Select make--":
+        models = ["--Select model--"] + models_by_make[selected_make]
+        selected_model = st.selectbox("Select AAC Device Model", models)
+    
+    return selected_make, selected_model
+
+def show_wheelchair_mounts():
+    """Display the wheelchair mounts page (existing functionality)"""
+    show_page_header("Wheelchair Mount Finder", WHEELCHAIR_INTRO, WHEELCHAIR_WARNING)
 
     # Load data with error handling
     try:
-        wheelchair_options = get_all_wheelchairs()
-        aac_devices = get_aac_devices()
+        wheelchair_options = dict(_load_wheelchairs(get_database_version()))
     except Exception as e:
         st.error(f"Failed to load data from database: {e}")
         logging.error(f"Data loading failed: {e}")
@@ -274,10 +441,6 @@ def show_wheelchair_mounts():
     if not wheelchair_options:
         st.error("No wheelchairs found in database.")
         return
-    
-    if not aac_devices:
-        st.error("No AAC devices found in database.")
-        return
 
     # Selection interface
     selected_wheelchair = st.selectbox(
@@ -285,15 +448,10 @@ def show_wheelchair_mounts():
         ["--Select Wheelchair--"] + list(wheelchair_options.keys())
     )
     
-    makes = ["--Select make--"] + sorted(list(set(device[0] for device in aac_devices)))
-    selected_make = st.selectbox("Select AAC Device Make", makes)
-
-    selected_model = "--Select model--"
-    if selected_make != "--Select make--":
-        models = ["--Select model--"] + sorted(list(set(
-            device[1] for device in aac_devices if device[0] == selected_make
-        )))
-        selected_model = st.selectbox("Select AAC Device Model", models)
+    device = select_aac_device()
+    if device is None:
+        return
+    selected_make, selected_model = device
     
     # Add left-hand side checkbox
     left_hand_side = st.checkbox(
@@ -311,73 +469,34 @@ def show_wheelchair_mounts():
 
         try:
             wheelchair_id = wheelchair_options[selected_wheelchair]
-            aac_device_id = get_aac_device_by_make_model(selected_make, selected_model)
+            aac_device_id = _device_id(selected_make, selected_model)
             
             if not aac_device_id:
                 st.error("Selected AAC device not found.")
                 return
 
-            # Get recommendations
-            recommendations = get_recommendations(wheelchair_id, aac_device_id, left_hand_side=left_hand_side)
-
-            if isinstance(recommendations, str):
-                st.error(recommendations)
-                return
-
-            # Display solutions
-            display_mount_solutions(recommendations, aac_device_id)
+            # Hand the selection to the result panel, which can rerun on its own
+            st.session_state.solution_request = (wheelchair_id, aac_device_id, left_hand_side)
+            show_solution_panel()
             
         except Exception as e:
             st.error(f"An error occurred while finding solutions: {e}")
             logging.error(f"Solution finding failed: {e}")
 
+    # Keep showing the last result on unrelated reruns while the selection still matches it
+    elif st.session_state.get("solution_request") and selected_wheelchair in wheelchair_options:
+        wheelchair_id = wheelchair_options[selected_wheelchair]
+        if st.session_state.solution_request == (wheelchair_id, _device_id(selected_make, selected_model), left_hand_side):
+            show_solution_panel()
+
 def show_floorstands():
     """Display the floorstands page"""
-    st.markdown("<h1 style='text-align: center;'>Floor Stand Finder</h1>", unsafe_allow_html=True)
-    
-    # Back button
-    if st.button("← Back to Main Menu"):
-        st.session_state.page = "landing"
-        st.rerun()
-
-    st.write("""
-    This tool will help you find suitable floor stand solutions for your AAC device.
-    """)
-
-    # Warning message
-    st.warning("""
-    ⚠️ Please note: This app is intended to be used as a guide, and the suggestions provided are based on general compatibility. The final solution may 
-    vary depending on factors such as:
-    - Specific positioning requirements
-    - User needs and preferences
-    - Environmental considerations
-    - Height and weight requirements
-
-    Always consult with a qualified professional to confirm the most appropriate floor stand solution for your specific needs.
-    """)
-
-    # Load AAC devices
-    try:
-        aac_devices = get_aac_devices()
-    except Exception as e:
-        st.error(f"Failed to load data from database: {e}")
-        logging.error(f"Data loading failed: {e}")
-        return
+    show_page_header("Floor Stand Finder", FLOORSTAND_INTRO, FLOORSTAND_WARNING)
 
-    if not aac_devices:
-        st.error("No AAC devices found in database.")
+    device = select_aac_device()
+    if device is None:
         return
-
-    # Device selection interface
-    makes = ["--Select make--"] + sorted(list(set(device[0] for device in aac_devices)))
-    selected_make = st.selectbox("Select AAC Device Make", makes)
-
-    selected_model = "--Select model--"
-    if selected_make != "--Select make--":
-        models = ["--Select model--"] + sorted(list(set(
-            device[1] for device in aac_devices if device[0] == selected_make
-        )))
-        selected_model = st.selectbox("Select AAC Device Model", models)
+    selected_make, selected_model = device
 
     # Process selection
     if st.button("Find Floor Stands"):
@@ -386,18 +505,8 @@ def show_floorstands():
             return
 
         try:
-            aac_device_id = get_aac_device_by_make_model(selected_make, selected_model)
-            
-            if not aac_device_id:
-                st.error("Selected AAC device not found.")
-                return
-
             # Get suitable floorstands
-            floorstands = get_floorstands_for_device(aac_device_id)
-
-            if isinstance(floorstands, str):
-                st.error(floorstands)
-                return
+            floorstands = _cached_floorstands(selected_make, selected_model)
 
             if not floorstands:
                 st.warning("No suitable floor stands found for the selected device.")
@@ -406,58 +515,20 @@ def show_floorstands():
             # Display floorstands
             st.success(f"Found {len(floorstands)} suitable floor stand(s) for your device:")
             display_floorstands_by_manufacturer(floorstands)
+        except RecommendationError as e:
+            st.error(str(e))
         except Exception as e:
             st.error(f"An error occurred while finding floor stands: {e}")
             logging.error(f"Floor stand finding failed: {e}")
             
 def show_tablemounts():
     """Display the table mounts page"""
-    st.markdown("<h1 style='text-align: center;'>Table Mount Finder</h1>", unsafe_allow_html=True)
-    
-    # Back button
-    if st.button("← Back to Main Menu"):
-        st.session_state.page = "landing"
-        st.rerun()
-
-    st.write("""
-    This tool will help you find suitable table mounting solutions for your AAC device.
-    """)
-
-    # Warning message
-    st.warning("""
-    ⚠️ Please note: This app is intended to be used as a guide, and the suggestions provided are based on general compatibility. The final solution may 
-    vary depending on factors such as:
-    - Table thickness and material
-    - Specific positioning requirements
-    - User needs and preferences
-    - Environmental considerations
-    - Desk/table stability requirements
-
-    Always consult with a qualified professional to confirm the most appropriate table mount solution for your specific needs.
-    """)
+    show_page_header("Table Mount Finder", TABLEMOUNT_INTRO, TABLEMOUNT_WARNING)
 
-    # Load AAC devices
-    try:
-        aac_devices = get_aac_devices()
-    except Exception as e:
-        st.error(f"Failed to load data from database: {e}")
-        logging.error(f"Data loading failed: {e}")
+    device = select_aac_device()
+    if device is None:
         return
-
-    if not aac_devices:
-        st.error("No AAC devices found in database.")
-        return
-
-    # Device selection interface
-    makes = ["--Select make--"] + sorted(list(set(device[0] for device in aac_devices)))
-    selected_make = st.selectbox("Select AAC Device Make", makes)
-
-    selected_model = "--Select model--"
-    if selected_make != "--Select make--":
-        models = ["--Select model--"] + sorted(list(set(
-            device[1] for device in aac_devices if device[0] == selected_make
-        )))
-        selected_model = st.selectbox("Select AAC Device Model", models)
+    selected_make, selected_model = device
 
     # Process selection
     if st.button("Find Table Mounts"):
@@ -466,18 +537,8 @@ def show_tablemounts():
             return
 
         try:
-            aac_device_id = get_aac_device_by_make_model(selected_make, selected_model)
-            
-            if not aac_device_id:
-                st.error("Selected AAC device not found.")
-                return
-
             # Get suitable table mounts
-            tablemounts = get_tablemounts_for_device(aac_device_id)
-
-            if isinstance(tablemounts, str):
-                st.error(tablemounts)
-                return
+            tablemounts = _cached_tablemounts(selected_make, selected_model)
 
             if not tablemounts:
                 st.warning("No suitable table mounts found for the selected device.")
@@ -487,26 +548,26 @@ def show_tablemounts():
             st.success(f"Found {len(tablemounts)} suitable table mount(s) for your device:")
             display_tablemounts_by_manufacturer_and_style(tablemounts)
             
+        except RecommendationError as e:
+            st.error(str(e))
         except Exception as e:
             st.error(f"An error occurred while finding table mounts: {e}")
             logging.error(f"Table mount finding failed: {e}")
 
 def main():
     """Main Streamlit application function"""
+    # The current page lives in the URL so back/forward and shared links work
+    page = st.query_params.get("page", "landing")
     
-    # Initialize session state
-    if 'page' not in st.session_state:
-        st.session_state.page = "landing"
-    
-    # Display appropriate page based on session state
-    if st.session_state.page == "landing":
-        show_landing_page()
-    elif st.session_state.page == "wheelchair_mounts":
+    # Display appropriate page based on the query string
+    if page == "wheelchair_mounts":
         show_wheelchair_mounts()
-    elif st.session_state.page == "floorstands":
+    elif page == "floorstands":
         show_floorstands()
-    elif st.session_state.page == "tablemounts":
+    elif page == "tablemounts":
         show_tablemounts()
+    else:
+        show_landing_page()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
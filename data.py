@@ -2,30 +2,108 @@
 
 import sqlite3
 import os
+import atexit
 import logging
-from typing import Dict, List, Tuple, Optional, Union
+import logging.handlers
+import queue
+import streamlit as st
+from typing import Dict, List, NamedTuple, Tuple
 from contextlib import contextmanager
+from pathlib import Path
+from bisect import bisect_right
 
 # -------------------------------
 # Logging setup
 # -------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+# Records are queued by the calling thread and written to the file and console
+# by a background listener, so request threads never block on log I/O.
+# Like basicConfig, this does nothing if the root logger is already configured.
+if not logging.getLogger().handlers:
+    _log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    _log_handlers = [logging.FileHandler("app.log", delay=True), logging.StreamHandler()]
+    for _handler in _log_handlers:
+        _handler.setFormatter(_log_formatter)
+
+    _log_queue = queue.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+    logging.getLogger().setLevel(logging.INFO)
 
 # -------------------------------
 # Database path
 # -------------------------------
 DB_PATH = os.path.join(os.path.dirname(__file__), "mounting_solutions.db")
 
+# Bump whenever a query changes shape, so caches persisted to disk by the
+# app are not served after a deploy; database edits are caught by mtime
+SCHEMA_VERSION = 4
+
+# -------------------------------
+# Row types (plain tuples with named fields, so they pickle for st.cache_data)
+# -------------------------------
+class Mount(NamedTuple):
+    id: int
+    name: str
+    manufacturer: str
+    weight_capacity: float
+    description: str
+    url: str
+
+class Component(NamedTuple):
+    """A clamp or adaptor"""
+    id: int
+    name: str
+    manufacturer: str
+    description: str
+    url: str
+
+class Floorstand(NamedTuple):
+    id: int
+    name: str
+    manufacturer: str
+    description: str
+    url: str
+    weight_capacity: float
+    max_height: float
+
+class Tablemount(NamedTuple):
+    id: int
+    name: str
+    manufacturer: str
+    description: str
+    url: str
+    max_weight: float
+    style: str
+
+# -------------------------------
+# Errors
+# -------------------------------
+class RecommendationError(Exception):
+    """Raised with a user-facing message when recommendations can't be produced"""
+
+# -------------------------------
+# Manufacturer keys (lowercased at ingest)
+# -------------------------------
+REHADAPT = "rehadapt"
+DAESSY = "daessy"
+
 # -------------------------------
 # Constants for mount logic
 # -------------------------------
+# Weight bands as (lower bounds in kg, mount ids): a device weighing at least
+# bounds[i] (and below bounds[i + 1]) gets ids[i + 1]; lighter ones get ids[0]
+REHADAPT_RIGHT_BANDS = ((1.1, 1.6, 2.6), (6, 4, 1, 3))  # L3D, H3D Short, M3D Quickshift, M3D Plus HD
+REHADAPT_LEFT_BANDS = ((1.7, 2.8), (13, 2, 3))  # H3D Short UDS Sturdy, M3D Quickshift Sturdy, M3D Plus HD
+DAESSY_BANDS = ((2.6,), (10, 7))  # M Series Bent Pole, Locking Bent Pole
+
+def _band_lookup(bands: Tuple[Tuple[float, ...], Tuple[int, ...]], device_weight: float) -> int:
+    """Get the mount ID for a device weight from a weight band table"""
+    bounds, mount_ids = bands
+    return mount_ids[bisect_right(bounds, device_weight)]
+
 class MountLogic:
     """Centralized mount selection logic to avoid duplication"""
     
@@ -34,31 +112,15 @@ class MountLogic:
         """Get Rehadapt mount ID based on device weight and mounting side"""
         if left_hand_side:
             # Use sturdy mounts with rotation lock for left-hand side
-            if device_weight >= 2.8:
-                return 3  # M3D Plus HD
-            elif 1.7 <= device_weight <= 2.79:
-                return 2 #M3D Quickshift Sturdy
-            else:
-                return 13  # H3D Short UDS Sturdy
-        else:
-            # Standard right-hand side mounts
-            if device_weight >= 2.6:
-                return 3
-            elif 1.6 <= device_weight <= 2.59:
-                return 1
-            elif 1.1 <= device_weight <= 1.59:
-                return 4
-            else:
-                return 6
+            return _band_lookup(REHADAPT_LEFT_BANDS, device_weight)
+        # Standard right-hand side mounts
+        return _band_lookup(REHADAPT_RIGHT_BANDS, device_weight)
     
     @staticmethod
     def get_daessy_mount_id(device_weight: float, left_hand_side: bool = False) -> int:
         """Get Daessy mount ID based on device weight and mounting side"""
         # Daessy mounts are typically stable regardless of side due to their locking mechanism
-        if device_weight >= 2.6:
-            return 7
-        else:
-            return 10
+        return _band_lookup(DAESSY_BANDS, device_weight)
     
     @staticmethod
     def get_mount_recommendation_note(left_hand_side: bool) -> str:
@@ -71,188 +133,253 @@ class MountLogic:
 # -------------------------------
 # DB Helpers
 # -------------------------------
+# Number of reader connections; each Streamlit script thread borrows one
+POOL_SIZE = 4
+
+def _open_reader(source: sqlite3.Connection) -> sqlite3.Connection:
+    """Copy a database into a new read-only in-memory connection"""
+    # A larger statement cache lets repeated queries skip re-parsing and planning.
+    # Autocommit mode: explicit transactions only come from read_transaction().
+    conn = sqlite3.connect(":memory:", check_same_thread=False, cached_statements=256, isolation_level=None)
+    source.backup(conn)
+    conn.executescript("""
+        PRAGMA temp_store=MEMORY;
+        PRAGMA query_only=1;
+    """)
+    # Close cleanly when the server process exits
+    atexit.register(conn.close)
+    return conn
+
+@st.cache_resource
+def _get_pool() -> Tuple[int, queue.Queue]:
+    """Load the database into a pool of in-memory connections once per process
+    
+    Returns the file's modification time (ns) at load alongside the pool.
+    """
+    # The reference data is small and the app never writes it, so each reader
+    # gets its own snapshot and queries run in parallel without locking; the
+    # file (and its -wal/-shm) is only read here at startup. Read-only mode
+    # takes no write locks and fails instead of creating an empty file.
+    disk = sqlite3.connect(Path(DB_PATH).as_uri() + "?mode=ro", uri=True)
+    try:
+        mtime_ns = max(os.stat(path).st_mtime_ns for path in (DB_PATH, DB_PATH + "-wal") if os.path.exists(path))
+        first = _open_reader(disk)
+    finally:
+        disk.close()
+    
+    pool = queue.Queue(maxsize=POOL_SIZE)
+    pool.put(first)
+    for _ in range(POOL_SIZE - 1):
+        pool.put(_open_reader(first))
+    logging.info(f"Loaded database into {POOL_SIZE} in-memory connections.")
+    return mtime_ns, pool
+
+def get_database_version() -> Tuple[int, int]:
+    """Identify the loaded database as (SCHEMA_VERSION, file mtime) for caches that outlive the process"""
+    mtime_ns, _ = _get_pool()
+    return SCHEMA_VERSION, mtime_ns
+
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
-    conn = None
+    """Context manager that borrows a connection from the pool"""
+    _, pool = _get_pool()
+    conn = pool.get()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        logging.info("Connected to database.")
         yield conn
     except sqlite3.Error as e:
         logging.error(f"Database connection failed: {e}")
-        if conn:
-            conn.rollback()
+        conn.rollback()
         raise
     finally:
-        if conn:
-            conn.close()
+        pool.put(conn)
+
+@contextmanager
+def read_transaction(conn: sqlite3.Connection):
+    """Run a group of reads in one transaction so they share a consistent snapshot"""
+    conn.execute("BEGIN")
+    try:
+        yield conn.cursor()
+    finally:
+        conn.commit()
 
-def safe_sql_in_clause(ids: List[int]) -> Tuple[str, List[int]]:
-    """Safely create IN clause for SQL queries"""
-    if not ids:
-        return "id IN ()", []
-    placeholders = ','.join('?' * len(ids))
-    return f"id IN ({placeholders})", ids
+def _group_by_manufacturer(rows: List[NamedTuple]) -> Dict[str, List[NamedTuple]]:
+    """Group component rows by lowercased manufacturer, preserving row order"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.manufacturer.lower(), []).append(row)
+    return groups
 
 def get_all_wheelchairs() -> Dict[str, int]:
-    """Get all wheelchairs as a dict mapping model to ID"""
+    """Get all wheelchairs as a dict mapping model to ID
+    
+    Raises sqlite3.Error on failure, so callers that cache the result never
+    keep an empty result from a failed query.
+    """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id, model FROM wheelchairs ORDER BY model")
             results = cursor.fetchall()
-            return {row[1]: row[0] for row in results}
+            return {model: wheelchair_id for wheelchair_id, model in results}
     except sqlite3.Error as e:
         logging.error(f"Failed to fetch wheelchairs: {e}")
-        return {}
+        raise
 
-def get_aac_devices() -> List[Tuple[str, str]]:
-    """Get all AAC devices as list of (make, model) tuples"""
+def get_aac_devices() -> List[Tuple[str, str, int]]:
+    """Get all AAC devices as list of (make, model, id) tuples
+    
+    Raises sqlite3.Error on failure, like get_all_wheelchairs.
+    """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT make, model FROM aac_devices ORDER BY make, model")
+            cursor.execute("SELECT make, model, id FROM aac_devices ORDER BY make, model, id")
             return cursor.fetchall()
     except sqlite3.Error as e:
         logging.error(f"Failed to fetch AAC devices: {e}")
-        return []
-
-def get_aac_device_by_make_model(make: str, model: str) -> Optional[int]:
-    """Get AAC device ID by make and model"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM aac_devices WHERE make = ? AND model = ?", (make, model))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except sqlite3.Error as e:
-        logging.error(f"Failed to fetch AAC device by make/model: {e}")
-        return None
+        raise
 
-def get_floorstands_for_device(aac_device_id: int) -> Union[List[Tuple], str]:
-    """Get suitable floorstands for an AAC device based on weight capacity"""
+def get_floorstands_by_make_model(make: str, model: str) -> List[Floorstand]:
+    """Get suitable floorstands for an AAC device based on weight capacity
+    
+    Raises RecommendationError with a message for the user on failure.
+    """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # First get the device weight
-            cursor.execute("SELECT weight FROM aac_devices WHERE id = ?", (aac_device_id,))
-            device_result = cursor.fetchone()
-            
-            if not device_result:
-                return "Invalid AAC device selection."
-            
-            device_weight = device_result[0]
-            
-            # Get all floorstands that can support the device weight
-            # Structure: (id, name, manufacturer, description, url, weight_capacity, max_height)
+            # Join the device to every floorstand that can support its weight.
+            # The device is the lowest id for the make/model, as in the app's
+            # make/model index. The LEFT JOIN keeps one all-NULL row when the
+            # device exists but nothing fits, so a missing device is the only
+            # empty result.
             cursor.execute("""
-                SELECT id, name, manufacturer, description, url, weight_capacity, max_height 
-                FROM floorstands 
-                WHERE weight_capacity >= ? 
-                ORDER BY manufacturer, name
-            """, (device_weight,))
+                SELECT f.id, f.name, f.manufacturer, f.description, f.url, f.weight_capacity, f.max_height
+                FROM (SELECT weight FROM aac_devices WHERE make = ? AND model = ? ORDER BY id LIMIT 1) d
+                LEFT JOIN floorstands f ON f.weight_capacity >= d.weight
+                ORDER BY f.manufacturer, f.name
+            """, (make, model))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                raise RecommendationError("Selected AAC device not found.")
             
-            floorstands = cursor.fetchall()
-            return floorstands
+            floorstands = [Floorstand._make(row) for row in rows]
+            return [floorstand for floorstand in floorstands if floorstand.id is not None]
             
+    except RecommendationError:
+        raise
     except sqlite3.Error as e:
         logging.error(f"Failed to get floorstands for device: {e}")
-        return "Failed to retrieve floorstands due to a database error."
+        raise RecommendationError("Failed to retrieve floorstands due to a database error.") from e
     except Exception as e:
-        logging.error(f"Unexpected error in get_floorstands_for_device: {e}")
-        return "An unexpected error occurred while getting floorstands."
+        logging.error(f"Unexpected error in get_floorstands_by_make_model: {e}")
+        raise RecommendationError("An unexpected error occurred while getting floorstands.") from e
 
-def get_tablemounts_for_device(aac_device_id: int) -> Union[List[Tuple], str]:
-    """Get suitable table mounts for an AAC device based on weight capacity"""
+def get_tablemounts_by_make_model(make: str, model: str) -> List[Tablemount]:
+    """Get suitable table mounts for an AAC device based on weight capacity
+    
+    Raises RecommendationError with a message for the user on failure.
+    """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # First get the device weight
-            cursor.execute("SELECT weight FROM aac_devices WHERE id = ?", (aac_device_id,))
-            device_result = cursor.fetchone()
-            
-            if not device_result:
-                return "Invalid AAC device selection."
-            
-            device_weight = device_result[0]
-            
-            # Get all table mounts that can support the device weight
-            # Structure: (id, name, manufacturer, description, url, max_weight, style)
+            # Join the device to every table mount that can support its weight.
+            # The device is the lowest id for the make/model, as in the app's
+            # make/model index. The LEFT JOIN keeps one all-NULL row when the
+            # device exists but nothing fits, so a missing device is the only
+            # empty result.
             cursor.execute("""
-                SELECT id, name, manufacturer, description, url, max_weight, style 
-                FROM tablemounts 
-                WHERE max_weight >= ? 
-                ORDER BY manufacturer, style, name
-            """, (device_weight,))
+                SELECT t.id, t.name, t.manufacturer, t.description, t.url, t.max_weight, t.style
+                FROM (SELECT weight FROM aac_devices WHERE make = ? AND model = ? ORDER BY id LIMIT 1) d
+                LEFT JOIN tablemounts t ON t.max_weight >= d.weight
+                ORDER BY t.manufacturer, t.style, t.name
+            """, (make, model))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                raise RecommendationError("Selected AAC device not found.")
             
-            tablemounts = cursor.fetchall()
-            return tablemounts
+            tablemounts = [Tablemount._make(row) for row in rows]
+            return [tablemount for tablemount in tablemounts if tablemount.id is not None]
             
+    except RecommendationError:
+        raise
     except sqlite3.Error as e:
         logging.error(f"Failed to get table mounts for device: {e}")
-        return "Failed to retrieve table mounts due to a database error."
+        raise RecommendationError("Failed to retrieve table mounts due to a database error.") from e
     except Exception as e:
-        logging.error(f"Unexpected error in get_tablemounts_for_device: {e}")
-        return "An unexpected error occurred while getting table mounts."
+        logging.error(f"Unexpected error in get_tablemounts_by_make_model: {e}")
+        raise RecommendationError("An unexpected error occurred while getting table mounts.") from e
 
-def get_recommendations(wheelchair_id: int, aac_device_id: int, uses_eyegaze: bool = False, left_hand_side: bool = False) -> Union[Dict, str]:
-    """Get mounting recommendations for wheelchair and AAC device combination"""
+def get_recommendations(wheelchair_id: int, aac_device_id: int, uses_eyegaze: bool = False, left_hand_side: bool = False) -> Dict:
+    """Get mounting recommendations for wheelchair and AAC device combination
+    
+    Raises RecommendationError with a message for the user on failure.
+    """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            # Get wheelchair details
-            cursor.execute("SELECT model, frame_clamps, mount_location FROM wheelchairs WHERE id = ?", (wheelchair_id,))
-            wheelchair = cursor.fetchone()
-
-            # Get AAC device details
-            cursor.execute("SELECT weight FROM aac_devices WHERE id = ?", (aac_device_id,))
-            aac_device = cursor.fetchone()
-
-            if not wheelchair or not aac_device:
-                return "Invalid wheelchair or AAC device selection."
+        with get_db_connection() as conn, read_transaction(conn) as cursor:
+            # Get wheelchair and AAC device details in a single lookup
+            cursor.execute("""
+                SELECT w.mount_location, d.weight,
+                       EXISTS (SELECT 1 FROM wheelchair_clamps WHERE wheelchair_id = w.id)
+                FROM wheelchairs w, aac_devices d
+                WHERE w.id = ? AND d.id = ?
+            """, (wheelchair_id, aac_device_id))
+            selection = cursor.fetchone()
 
-            frame_clamp_ids = [int(id.strip()) for id in wheelchair[1].split(',')]
-            mount_location = wheelchair[2]
-            device_weight = aac_device[0]
+            if not selection:
+                raise RecommendationError("Invalid wheelchair or AAC device selection.")
 
-            # Get frame clamps
-            clamp_where, clamp_params = safe_sql_in_clause(frame_clamp_ids)
-            cursor.execute(f"SELECT * FROM clamps WHERE {clamp_where}", clamp_params)
-            frame_clamps = cursor.fetchall()
+            mount_location, device_weight, has_frame_clamps = selection
 
-            # Get all suitable mounts by weight
-            cursor.execute(
-                "SELECT * FROM mounts WHERE weight_capacity >= ? ORDER BY weight_capacity ASC",
-                (device_weight,)
-            )
-            all_mounts = cursor.fetchall()
+            if not has_frame_clamps:
+                raise RecommendationError("No frame clamps are listed for the selected wheelchair.")
 
             # Get primary mount IDs using centralized logic
             rehadapt_mount_id = MountLogic.get_rehadapt_mount_id(device_weight, left_hand_side)
             daessy_mount_id = MountLogic.get_daessy_mount_id(device_weight, left_hand_side)
             primary_mount_ids = [rehadapt_mount_id, daessy_mount_id]
 
-            # Get primary mounts
-            primary_where, primary_params = safe_sql_in_clause(primary_mount_ids)
-            cursor.execute(f"SELECT * FROM mounts WHERE {primary_where}", primary_params)
-            primary_mounts = cursor.fetchall()
-
-            # Separate primary and other mounts
-            primary_mount_dict = {mount[0]: mount for mount in primary_mounts}
-            other_mounts = [m for m in all_mounts if m[0] not in primary_mount_dict]
-            mounts = list(primary_mount_dict.values()) + other_mounts
+            # Get the frame clamps, the adapter ring and the mounts in one tagged
+            # UNION ALL (clamps and adaptors get a NULL weight_capacity). Mounts
+            # come back as the primaries in id order, then every other mount
+            # suitable by weight, lightest first.
+            cursor.execute("""
+                SELECT 'clamp' AS kind, 0 AS is_primary, 0 AS primary_order,
+                       c.id, c.name, c.manufacturer, NULL AS weight_capacity, c.description, c.url
+                FROM clamps c JOIN wheelchair_clamps wc ON wc.clamp_id = c.id
+                WHERE wc.wheelchair_id = ?
+                UNION ALL
+                SELECT 'adaptor', 0, 0, id, name, manufacturer, NULL, description, url
+                FROM adaptors WHERE id = 1
+                UNION ALL
+                SELECT 'mount', is_primary, is_primary * id,
+                       id, name, manufacturer, weight_capacity, description, url
+                FROM (SELECT id, name, manufacturer, weight_capacity, description, url,
+                             (id IN (?, ?)) AS is_primary
+                      FROM mounts)
+                WHERE weight_capacity >= ? OR is_primary
+                ORDER BY kind, is_primary DESC, primary_order, weight_capacity, id
+            """, (wheelchair_id, *primary_mount_ids, device_weight))
 
-            # Get adapter ring
-            cursor.execute("SELECT * FROM adaptors WHERE id = 1")
-            adapter_ring = cursor.fetchone()
+            frame_clamps = []
+            mounts = []
+            adapter_ring = None
+            for kind, _, _, id, name, manufacturer, weight_capacity, description, url in cursor.fetchall():
+                if kind == "mount":
+                    mounts.append(Mount(id, name, manufacturer, weight_capacity, description, url))
+                elif kind == "clamp":
+                    frame_clamps.append(Component(id, name, manufacturer, description, url))
+                else:
+                    adapter_ring = Component(id, name, manufacturer, description, url)
 
             return {
                 "frame_clamps": frame_clamps,
                 "mounts": mounts,
+                "clamps_by_manufacturer": _group_by_manufacturer(frame_clamps),
+                "mounts_by_manufacturer": _group_by_manufacturer(mounts),
                 "adapter_ring": adapter_ring,
                 "mount_location": mount_location,
                 "device_weight": device_weight,
@@ -261,9 +388,11 @@ def get_recommendations(wheelchair_id: int, aac_device_id: int, uses_eyegaze: bo
                 "mount_note": MountLogic.get_mount_recommendation_note(left_hand_side)
             }
 
+    except RecommendationError:
+        raise
     except sqlite3.Error as e:
         logging.error(f"Failed to get recommendations: {e}")
-        return "Failed to retrieve recommendations due to a database error."
+        raise RecommendationError("Failed to retrieve recommendations due to a database error.") from e
     except Exception as e:
         logging.error(f"Unexpected error in get_recommendations: {e}")
-        return "An unexpected error occurred while getting recommendations."
\ No newline at end of file
+        raise RecommendationError("An unexpected error occurred while getting recommendations.") from e
\ No newline at end of file
@@ -1,9 +1,15 @@
 import sqlite3
+import sys
 
 def update_database():
     conn = sqlite3.connect('mounting_solutions.db')
     cursor = conn.cursor()
     
+    # Run every step in one transaction, committed once at the end;
+    # this is a one-off run, so skip the per-write syncs
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("BEGIN")
+    
     # First, create a new mounts table without the type column
     cursor.execute("""
         CREATE TABLE mounts (
@@ -26,50 +32,97 @@ def update_database():
     # Drop the old products table
     cursor.execute("DROP TABLE products")
     
-    # Reset IDs for each table
-    # Mounts
-    cursor.execute("""
-        CREATE TABLE temp_mounts AS
-        SELECT ROW_NUMBER() OVER (ORDER BY id) as id,
-               name, manufacturer, weight_capacity, description, url
-        FROM mounts
-    """)
-    cursor.execute("DROP TABLE mounts")
-    cursor.execute("ALTER TABLE temp_mounts RENAME TO mounts")
+    # Commit the changes
+    conn.commit()
     
-    # Clamps
-    cursor.execute("""
-        CREATE TABLE temp_clamps AS
-        SELECT ROW_NUMBER() OVER (ORDER BY id) as id,
-               name, manufacturer, description, url
-        FROM clamps
-    """)
-    cursor.execute("DROP TABLE clamps")
-    cursor.execute("ALTER TABLE temp_clamps RENAME TO clamps")
+    # Ids are kept as they are: renumbering clamps would silently break the ids
+    # stored in wheelchair_clamps.clamp_id (and the wheelchairs.frame_clamps CSV
+    # it is built from). Just reclaim the dropped table's pages.
+    cursor.execute("VACUUM")
+    conn.close()
+
+def create_indexes():
+    conn = sqlite3.connect('mounting_solutions.db')
+    cursor = conn.cursor()
     
-    # Adaptors
-    cursor.execute("""
-        CREATE TABLE temp_adaptors AS
-        SELECT ROW_NUMBER() OVER (ORDER BY id) as id,
-               name, manufacturer, description, url
-        FROM adaptors
-    """)
-    cursor.execute("DROP TABLE adaptors")
-    cursor.execute("ALTER TABLE temp_adaptors RENAME TO adaptors")
+    # Device lookup by make/model from the selection dropdowns; weight is
+    # included so the floor stand / table mount joins never touch the table
+    # (aac_devices.id is already the INTEGER PRIMARY KEY, so needs no index)
+    cursor.execute("DROP INDEX IF EXISTS idx_aac_make_model")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_aac_make_model_weight ON aac_devices(make, model, weight)")
+    
+    # Weight-capacity range filters
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mounts_weight ON mounts(weight_capacity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_floorstands_weight ON floorstands(weight_capacity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tablemounts_weight ON tablemounts(max_weight)")
+    
+    # Give the query planner row counts for the new indexes
+    cursor.execute("ANALYZE")
+    
+    conn.commit()
+    conn.close()
+
+def key_lookup_tables():
+    conn = sqlite3.connect('mounting_solutions.db')
+    cursor = conn.cursor()
+    
+    # The id columns of these tables were left untyped by an earlier CREATE
+    # TABLE AS id reset, so every "WHERE id IN (...)" lookup scanned the table.
+    # Rebuild them with id as INTEGER PRIMARY KEY (an alias for the rowid)
+    # so a lookup is a single b-tree seek.
+    tables = {
+        "mounts": "name TEXT, manufacturer TEXT, weight_capacity REAL, description TEXT, url TEXT",
+        "clamps": "name TEXT, manufacturer TEXT, description TEXT, url TEXT",
+        "adaptors": "name TEXT, manufacturer TEXT, description TEXT, url TEXT",
+    }
+    cursor.execute("BEGIN")
+    for table, columns in tables.items():
+        pk = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})") if row[5]]
+        if pk == ["id"]:
+            continue
+        cursor.execute(f"CREATE TABLE temp_{table} (id INTEGER PRIMARY KEY, {columns})")
+        cursor.execute(f"INSERT INTO temp_{table} SELECT * FROM {table} ORDER BY id")
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE temp_{table} RENAME TO {table}")
+    
+    conn.commit()
+    conn.close()
+
+def create_wheelchair_clamps():
+    conn = sqlite3.connect('mounting_solutions.db')
+    cursor = conn.cursor()
     
-    # Floorstands
+    cursor.execute("BEGIN")
+    
+    # One row per wheelchair/frame clamp pair, parsed from the comma-separated
+    # wheelchairs.frame_clamps column (which is left in place)
     cursor.execute("""
-        CREATE TABLE temp_floorstands AS
-        SELECT ROW_NUMBER() OVER (ORDER BY id) as id,
-               name, manufacturer, description, url
-        FROM floorstands
+        CREATE TABLE IF NOT EXISTS wheelchair_clamps (
+            wheelchair_id INTEGER NOT NULL,
+            clamp_id INTEGER NOT NULL,
+            PRIMARY KEY (wheelchair_id, clamp_id)
+        ) WITHOUT ROWID
     """)
-    cursor.execute("DROP TABLE floorstands")
-    cursor.execute("ALTER TABLE temp_floorstands RENAME TO floorstands")
+    cursor.execute("DELETE FROM wheelchair_clamps")
+    
+    rows = cursor.execute("SELECT id, frame_clamps FROM wheelchairs WHERE frame_clamps IS NOT NULL").fetchall()
+    cursor.executemany(
+        "INSERT OR IGNORE INTO wheelchair_clamps (wheelchair_id, clamp_id) VALUES (?, ?)",
+        [(wheelchair_id, int(clamp_id)) for wheelchair_id, frame_clamps in rows
+         for clamp_id in frame_clamps.split(',') if clamp_id.strip()]
+    )
     
-    # Commit the changes
     conn.commit()
     conn.close()
 
+# Migration steps runnable from the command line, e.g.
+# `python migrate_clamps.py create_indexes`
+MIGRATIONS = {
+    "update_database": update_database,
+    "create_indexes": create_indexes,
+    "key_lookup_tables": key_lookup_tables,
+    "create_wheelchair_clamps": create_wheelchair_clamps,
+}
+
 if __name__ == "__main__":
-    update_database()
\ No newline at end of file
+    MIGRATIONS[sys.argv[1] if len(sys.argv) > 1 else "update_database"]()
\ No newline at end of file